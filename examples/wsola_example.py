@@ -2,7 +2,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-from time_stretching import OLA, WSOLA, FrameShiftBoundaries
+from time_stretching import WSOLA
 
 
 
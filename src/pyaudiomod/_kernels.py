@@ -0,0 +1,188 @@
+
+import numpy as np
+import numpy.typing as npt
+
+try:
+    from numba import njit, prange, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional, callers fall back to their pure numpy implementations
+    NUMBA_AVAILABLE = False
+
+
+
+if NUMBA_AVAILABLE:
+
+    def _array(dtype: types.Float, ndim: int, readonly: bool = False) -> types.Array:
+        """
+        Array type of any layout, so contiguous arrays, strided views and zero-stride broadcasts all share one compiled kernel
+        """
+        return types.Array(dtype, ndim, "A", readonly=readonly)
+
+
+    # The kernels are compiled eagerly for these signatures when this module is imported and the machine code is cached on disk,
+    # so later imports just load it and no run ever pays for JIT compilation
+    # Inputs are typed readonly, which writable arrays also convert to, and hopsize is int64
+    # Frames and window either share a dtype or get promoted to float64 (e.g. a float64 window applied to float32 frames)
+    _OLA_RECONSTRUCT_SIGNATURES = [
+        types.void(_array(dtype, 3, readonly=True), types.int64, _array(dtype, 2))
+        for dtype in (types.float32, types.float64)
+    ]
+    _WINDOWED_DTYPES = (
+        (types.float32, types.float32, types.float32),
+        (types.float64, types.float64, types.float64),
+        (types.float32, types.float64, types.float64),
+        (types.float64, types.float32, types.float64),
+    )
+    _OVERLAP_ADD_WINDOWED_SIGNATURES = [
+        types.void(_array(frames_dtype, 3, readonly=True), _array(window_dtype, 1, readonly=True), types.int64, _array(out_dtype, 2))
+        for frames_dtype, window_dtype, out_dtype in _WINDOWED_DTYPES
+    ]
+    # The shift search slices the signal into the dot products it vectorizes, which needs a contiguous signal
+    _WSOLA_FRAME_STARTS_SIGNATURES = [
+        types.void(types.Array(dtype, 1, "C", readonly=True), types.int64, types.int64, types.int64, types.int64, types.int64, _array(types.int64, 1))
+        for dtype in (types.float32, types.float64)
+    ]
+    _OVERLAP_ADD_WINDOWED_FROM_STARTS_SIGNATURES = [
+        types.void(_array(signal_dtype, 2, readonly=True), _array(types.int64, 1, readonly=True), _array(window_dtype, 1, readonly=True), types.int64, _array(out_dtype, 2))
+        for signal_dtype, window_dtype, out_dtype in _WINDOWED_DTYPES
+    ]
+
+
+    @njit(types.UniTuple(types.int64, 4)(types.int64, types.int64, types.int64, types.int64, types.int64), cache=True)
+    def _tile_frame_range(tile_idx: int, hopsize: int, frame_size: int, num_frames: int, signal_length: int) -> tuple[int, int, int, int]:
+        """
+        Returns the sample range of the hopsize long output tile tile_idx together with the
+        range of frames that overlap it, as (tile_start_idx, tile_end_idx, first_frame_idx, last_frame_idx)
+        """
+        tile_start_idx = tile_idx * hopsize
+        tile_end_idx = min(tile_start_idx + hopsize, signal_length)
+
+        # Frames that start more than frame_size samples before the tile don't reach it
+        first_frame_idx = max(0, ((tile_start_idx - frame_size) // hopsize) + 1)
+        last_frame_idx = min(num_frames - 1, (tile_end_idx - 1) // hopsize)
+
+        return tile_start_idx, tile_end_idx, first_frame_idx, last_frame_idx
+
+
+    @njit(_OLA_RECONSTRUCT_SIGNATURES, parallel=True, fastmath=True, cache=True)
+    def ola_reconstruct(frames: npt.NDArray, hopsize: int, out: npt.NDArray) -> None:
+        """
+        Overlap-adds frames that are spaced apart by hopsize into the preallocated out
+        frames is a numpy array with dimensions representing ("Number of Frames" x "Frame Size" x "Number of Channels")
+        and out has dimensions ("Signal Length" x "Number of Channels"), mono signals use a single channel
+
+        The output is split into tiles of hopsize samples, each tile only receives contributions
+        from the ~frame_size/hopsize frames overlapping it, so the tiles can be filled in parallel without write contention
+        """
+        num_frames = frames.shape[0]
+        frame_size = frames.shape[1]
+        num_channels = frames.shape[2]
+        signal_length = out.shape[0]
+        num_tiles = (signal_length + hopsize - 1) // hopsize
+
+        for tile_idx in prange(num_tiles):
+            tile_start_idx, tile_end_idx, first_frame_idx, last_frame_idx = _tile_frame_range(tile_idx, hopsize, frame_size, num_frames, signal_length)
+
+            for frame_idx in range(first_frame_idx, last_frame_idx + 1):
+                frame_start_idx = frame_idx * hopsize
+                start_idx = max(tile_start_idx, frame_start_idx)
+                end_idx = min(tile_end_idx, frame_start_idx + frame_size)
+                # One slice add per channel runs along the samples, which compiles to a tighter loop than an inner loop over the channels
+                for channel_idx in range(num_channels):
+                    out[start_idx:end_idx, channel_idx] += frames[frame_idx, start_idx-frame_start_idx:end_idx-frame_start_idx, channel_idx]
+
+
+    @njit(_OVERLAP_ADD_WINDOWED_SIGNATURES, parallel=True, fastmath=True, cache=True)
+    def overlap_add_windowed(frames: npt.NDArray, window: npt.NDArray, hopsize: int, out: npt.NDArray) -> None:
+        """
+        Same as ola_reconstruct, but every frame is multiplied by window on the fly
+        Fusing the windowing into the overlap-add avoids writing and reading back a windowed copy of frames
+        """
+        num_frames = frames.shape[0]
+        frame_size = frames.shape[1]
+        num_channels = frames.shape[2]
+        signal_length = out.shape[0]
+        num_tiles = (signal_length + hopsize - 1) // hopsize
+
+        for tile_idx in prange(num_tiles):
+            tile_start_idx, tile_end_idx, first_frame_idx, last_frame_idx = _tile_frame_range(tile_idx, hopsize, frame_size, num_frames, signal_length)
+
+            for frame_idx in range(first_frame_idx, last_frame_idx + 1):
+                frame_start_idx = frame_idx * hopsize
+                start_idx = max(tile_start_idx, frame_start_idx)
+                end_idx = min(tile_end_idx, frame_start_idx + frame_size)
+                for sample_idx in range(start_idx, end_idx):
+                    weight = window[sample_idx - frame_start_idx]
+                    for channel_idx in range(num_channels):
+                        out[sample_idx, channel_idx] += frames[frame_idx, sample_idx - frame_start_idx, channel_idx] * weight
+
+
+
+    @njit(_OVERLAP_ADD_WINDOWED_FROM_STARTS_SIGNATURES, parallel=True, fastmath=True, cache=True)
+    def overlap_add_windowed_from_starts(signal: npt.NDArray, frame_start_indices: npt.NDArray, window: npt.NDArray, hopsize: int, out: npt.NDArray) -> None:
+        """
+        Same as overlap_add_windowed, but frame i is read straight out of signal as signal[frame_start_indices[i]:frame_start_indices[i]+frame_size]
+        signal has dimensions ("Signal Length" x "Number of Channels"), so no ("Number of Frames" x "Frame Size") matrix of frames is ever built
+        """
+        num_frames = frame_start_indices.shape[0]
+        frame_size = window.shape[0]
+        num_channels = signal.shape[1]
+        signal_length = out.shape[0]
+        num_tiles = (signal_length + hopsize - 1) // hopsize
+
+        for tile_idx in prange(num_tiles):
+            tile_start_idx, tile_end_idx, first_frame_idx, last_frame_idx = _tile_frame_range(tile_idx, hopsize, frame_size, num_frames, signal_length)
+
+            for frame_idx in range(first_frame_idx, last_frame_idx + 1):
+                frame_start_idx = frame_idx * hopsize
+                analysis_offset = frame_start_indices[frame_idx] - frame_start_idx
+                start_idx = max(tile_start_idx, frame_start_idx)
+                end_idx = min(tile_end_idx, frame_start_idx + frame_size)
+                for sample_idx in range(start_idx, end_idx):
+                    weight = window[sample_idx - frame_start_idx]
+                    for channel_idx in range(num_channels):
+                        out[sample_idx, channel_idx] += signal[sample_idx + analysis_offset, channel_idx] * weight
+
+
+
+    @njit(_WSOLA_FRAME_STARTS_SIGNATURES, fastmath=True, cache=True)
+    def wsola_frame_starts(signal: npt.NDArray,
+                           frame_size: int,
+                           synthesis_hopsize: int,
+                           analysis_hopsize: int,
+                           min_shift: int,
+                           max_shift: int,
+                           out: npt.NDArray) -> None:
+        """
+        Runs the WSOLA shift search of sigproc.wsola_frame_starts on a mono signal, writing the start index of every frame into out
+        Every candidate shift is scored with a dot product accumulated in the dtype of signal, which lets it compile to SIMD code
+
+        Each template depends on the shift picked for the previous frame, so the frames are searched one after the other,
+        and a search (a few hundred nanoseconds at the default sizes) is too short to split its shifts across threads
+
+        frame_size, the hopsizes and the shift boundaries are deliberately runtime arguments rather than constants baked into
+        a specialized kernel per configuration: the dot product already vectorizes with a runtime trip count, compiling it for
+        fixed sizes measured no faster, and every specialization would cost its own JIT compilation at first use
+        """
+        out[0] = 0
+        frame_start_idx = 0
+
+        for frame_idx in range(1, out.shape[0]):
+            natural_progression = signal[frame_start_idx+synthesis_hopsize:frame_start_idx+synthesis_hopsize+frame_size]
+            extended_frame_region_start_idx = (frame_idx * analysis_hopsize) + min_shift
+
+            # Ties go to the smallest shift, like np.argmax
+            best_shift_idx = 0
+            best_score = -np.inf
+            for shift_idx in range(max_shift - min_shift + 1):
+                candidate = signal[extended_frame_region_start_idx+shift_idx:extended_frame_region_start_idx+shift_idx+frame_size]
+                score = natural_progression[0] * candidate[0]
+                for sample_idx in range(1, frame_size):
+                    score += natural_progression[sample_idx] * candidate[sample_idx]
+                if score > best_score:
+                    best_score = score
+                    best_shift_idx = shift_idx
+
+            frame_start_idx = extended_frame_region_start_idx + best_shift_idx
+            out[frame_idx] = frame_start_idx
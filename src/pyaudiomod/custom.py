@@ -3,7 +3,7 @@ from dataclasses import dataclass
 
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FrameShiftBoundaries:
     min_shift: int = -10
     max_shift: int = 10
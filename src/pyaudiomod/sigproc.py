@@ -1,125 +1,464 @@
 
+import functools
+
 import numpy as np
 import numpy.typing as npt
 
 from custom import FrameShiftBoundaries
+from _kernels import NUMBA_AVAILABLE
+
+# Above this many multiply-adds (template length x number of lags) cross_correlate(method="auto") switches from the direct to the FFT method
+# Measured crossover, the direct method stays faster for everything up to e.g. a 4096 sample template with ~500 lags
+_FFT_CORRELATION_THRESHOLD = 2**21
+
+try:
+    import cupy
+    CUPY_AVAILABLE = True
+except ImportError:
+    # CuPy is optional, without it every array lives on the host
+    CUPY_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    from _kernels import ola_reconstruct
+    from _kernels import overlap_add_windowed as _overlap_add_windowed_kernel
+    from _kernels import overlap_add_windowed_from_starts as _overlap_add_windowed_from_starts_kernel
+    from _kernels import wsola_frame_starts as _wsola_frame_starts_kernel
+
+
+
+def get_array_module(array: npt.NDArray):
+    """
+    Returns the array module (cupy for GPU arrays, numpy otherwise) that array belongs to,
+    the framing and overlap-add functions below use it so they run on the device their input lives on
+    """
+    return cupy.get_array_module(array) if CUPY_AVAILABLE else np
+
+
+
+def array_module(backend: str):
+    """
+    Returns the array module of backend, "numpy" for host arrays or "cupy" for GPU arrays
+    """
+    if backend == "numpy":
+        return np
+    if backend != "cupy":
+        raise ValueError(f"Unknown backend: {backend}")
+    if not CUPY_AVAILABLE:
+        raise ImportError("The cupy backend requires cupy to be installed")
+
+    return cupy
+
+
+
+def to_host(array: npt.NDArray) -> npt.NDArray:
+    """
+    Returns array as a numpy array, copying it off the GPU if it is a cupy array
+    """
+    return cupy.asnumpy(array) if CUPY_AVAILABLE else np.asarray(array)
+
+
+
+def _use_kernels(array: npt.NDArray) -> bool:
+    """
+    The numba kernels only run on host (numpy) arrays
+    """
+    return NUMBA_AVAILABLE and get_array_module(array) is np
+
+
+
+def wsola_num_frames(signal_length: int,
+                     frame_size: int,
+                     synthesis_hopsize: int,
+                     analysis_hopsize: int,
+                     frame_shift_boundaries: FrameShiftBoundaries) -> int:
+    """
+    Returns the number of frames wsola_frame_starts (and split_into_frames_wsola) finds in a signal of signal_length samples
+    """
+    if signal_length < frame_size:
+        raise ValueError(f"Signal of length {signal_length} is shorter than a single frame of size {frame_size}")
+    if frame_shift_boundaries.min_shift > frame_shift_boundaries.max_shift:
+        raise ValueError(f"Invalid frame shift boundaries, {frame_shift_boundaries}")
+    if analysis_hopsize + frame_shift_boundaries.min_shift < 0:
+        raise ValueError(f"Frames can't be shifted back further than the analysis hopsize {analysis_hopsize}, {frame_shift_boundaries}")
 
+    # Frame i is searched for in signal[i*analysis_hopsize+min_shift:i*analysis_hopsize+frame_size+max_shift] using the natural progression
+    # of frame i-1, which ends at most at (i-1)*analysis_hopsize+max_shift+synthesis_hopsize+frame_size, so only count frames for which both fit inside the signal
+    # (the first frame is never shifted)
+    last_frame_idx = min((signal_length - frame_size - frame_shift_boundaries.max_shift) // analysis_hopsize,
+                         1 + ((signal_length - frame_size - max(frame_shift_boundaries.max_shift, 0) - synthesis_hopsize) // analysis_hopsize))
 
+    return max(1, last_frame_idx + 1)
 
-def split_into_frames(signal: npt.NDArray, 
-                      frame_size: int, 
-                      synthesis_hopsize: int, 
-                      analysis_hopsize: int, 
-                      frame_shift_boundaries: type[FrameShiftBoundaries]) -> npt.NDArray:
+
+
+def wsola_frame_starts(signal: npt.NDArray,
+                       frame_size: int,
+                       synthesis_hopsize: int,
+                       analysis_hopsize: int,
+                       frame_shift_boundaries: FrameShiftBoundaries,
+                       correlation_method: str = "auto") -> npt.NDArray:
+    """
+    Returns the start index in signal of every WSOLA analysis frame as an int64 array
+    Frame i is searched for around i*analysis_hopsize and can be shifted by some amount of samples within frame_shift_boundaries
+    (negative value indicates a backwards shift) to best match the natural progression of frame i-1
+    correlation_method selects how cross_correlate scores the candidate shifts of every frame
+    Multichannel signals ("Signal Length" x "Number of Channels") are searched on their mono downmix so all channels stay phase-aligned
+    The search is sequential, so it always runs on the host, GPU signals are downmixed on the device and copied over
+    """
+    num_frames = wsola_num_frames(signal.shape[0], frame_size, synthesis_hopsize, analysis_hopsize, frame_shift_boundaries)
+    search_signal = to_host(signal if signal.ndim == 1 else signal.mean(axis=1))
+    min_shift = frame_shift_boundaries.min_shift
+    max_shift = frame_shift_boundaries.max_shift
+
+    # Only the start index of every frame is tracked in the loop, the frames themselves are gathered in one go at the end
+    frame_start_indices = np.zeros(num_frames, dtype=np.int64)
+
+    if min_shift == max_shift:
+        # A single candidate shift leaves nothing to search, every frame after the first starts at a fixed offset
+        frame_start_indices[1:] = (np.arange(1, num_frames, dtype=np.int64) * analysis_hopsize) + min_shift
+        return frame_start_indices
+
+    correlation_method = _resolve_correlation_method(frame_size, max_shift - min_shift + 1, correlation_method)
+
+    if NUMBA_AVAILABLE and correlation_method == "direct":
+        # The compiled loop scores the shifts directly, ~7x faster than a np.correlate call per frame at the default sizes
+        _wsola_frame_starts_kernel(np.ascontiguousarray(search_signal), frame_size, synthesis_hopsize, analysis_hopsize, min_shift, max_shift, frame_start_indices)
+        return frame_start_indices
+
+    # Each template depends on the shift picked for the previous frame, so the search itself has to run frame by frame,
+    # but the strided views holding every candidate template and the extended frame region of every frame are set up once
+    # in front of the loop (region i-1 belongs to frame i and starts at i*analysis_hopsize+min_shift)
+    templates = np.lib.stride_tricks.sliding_window_view(search_signal, frame_size)
+    extended_frame_regions = np.lib.stride_tricks.sliding_window_view(search_signal, frame_size + max_shift - min_shift)[analysis_hopsize+min_shift::analysis_hopsize]
+    frame_start_idx = 0
+
+    for frame_idx in range(1, num_frames):
+        natural_progression = templates[frame_start_idx+synthesis_hopsize]
+        optimal_shift = min_shift + int(np.argmax(cross_correlate(natural_progression, extended_frame_regions[frame_idx-1], correlation_method)))
+
+        frame_start_idx = (frame_idx * analysis_hopsize) + optimal_shift
+        frame_start_indices[frame_idx] = frame_start_idx
+
+    return frame_start_indices
+
+
+
+def split_into_frames_wsola(signal: npt.NDArray, 
+                            frame_size: int, 
+                            synthesis_hopsize: int, 
+                            analysis_hopsize: int, 
+                            frame_shift_boundaries: FrameShiftBoundaries,
+                            correlation_method: str = "auto",
+                            out: npt.NDArray = None) -> npt.NDArray:
+    """
+    Splits signal into multiple frames, each having a fixed frame_size and starting at the indices found by wsola_frame_starts
+    signal is either mono, or multichannel with dimensions ("Signal Length" x "Number of Channels"), in which case the frames get a trailing channel axis
+    The frames are written into out when given, which needs to be a ("Number of Frames" x "Frame Size" [x "Number of Channels"]) array (see wsola_num_frames)
+    """
+    xp = get_array_module(signal)
+
+    # The frames matrix is sized up front from wsola_num_frames and checked before running the shift search
+    frames_shape = (wsola_num_frames(signal.shape[0], frame_size, synthesis_hopsize, analysis_hopsize, frame_shift_boundaries), frame_size) + signal.shape[1:]
+    if out is None:
+        out = xp.empty(frames_shape, dtype=signal.dtype)
+    elif out.shape != frames_shape:
+        raise ValueError(f"Frames buffer has shape {out.shape}, expected {frames_shape}")
+
+    frame_start_indices = wsola_frame_starts(signal, frame_size, synthesis_hopsize, analysis_hopsize, frame_shift_boundaries, correlation_method)
+
+    # Gathering from a sliding window view copies the frames straight into the preallocated contiguous (num_frames x frame_size) array
+    return xp.take(_frame_view(signal, frame_size), xp.asarray(frame_start_indices), axis=0, out=out)
+
+
+
+def _frame_view(signal: npt.NDArray, frame_size: int) -> npt.NDArray:
+    """
+    Returns a view of every frame_size long window of signal, with dimensions
+    ("Signal Length"-frame_size+1 x "Frame Size") for mono signals and
+    ("Signal Length"-frame_size+1 x "Frame Size" x "Number of Channels") for multichannel signals
+    """
+    xp = get_array_module(signal)
+    windows = xp.lib.stride_tricks.sliding_window_view(signal, frame_size, axis=0)
+    # sliding_window_view appends the window axis last, move it in front of the channel axis
+    return windows if signal.ndim == 1 else xp.moveaxis(windows, -1, 1)
+
+
+
+def _required_padding(signal_length: int, frame_size: int, hopsize: int) -> int:
+    """
+    Returns the number of zeros to append to a signal of signal_length samples so that it holds at least one frame
+    and signal_length - frame_size becomes a multiple of hopsize, i.e. the last frame ends exactly at the end of the signal
+    """
+    # (frame_size - signal_length) % hopsize is the distance to the next multiple of hopsize, and the first term
+    # only wins for signals shorter than a single frame
+    return max(frame_size - signal_length, (frame_size - signal_length) % hopsize)
+
+
+
+def fixed_num_frames(signal_length: int, frame_size: int, hopsize: int) -> int:
+    """
+    Returns the number of frames split_into_frames_fixed extracts from a signal of signal_length samples
+    """
+    return ((signal_length + _required_padding(signal_length, frame_size, hopsize) - frame_size) // hopsize) + 1
+
+
+
+def split_into_frames_fixed(signal: npt.NDArray, frame_size: int, hopsize: int, padded_signal: npt.NDArray = None) -> npt.NDArray:
     """
     Splits signal into multiple frames, each having a fixed frame_size and spaced apart by hopsize
-    frame can be shifted by some amount of samples within frame_shift_boundaries (negative value indicates a backwards shift)
+    The signal is zero padded at the end so that the last frame ends exactly at the end of the signal
+
+    The padded copy is written into padded_signal when given, which needs to hold ((num_frames-1)*hopsize) + frame_size samples
+    (see fixed_num_frames), otherwise it is allocated once and filled in place rather than concatenated with a separate array of zeros
+    Signals that don't need any padding are never copied
+    Multichannel signals ("Signal Length" x "Number of Channels") give frames with a trailing channel axis
+    The frames are a read-only strided view into the (padded) signal rather than a copy, callers that need to write to them
+    should make their own copy with np.ascontiguousarray
     """
     signal_length = signal.shape[0]
-    signal_length_without_last_frame = signal_length - frame_size
+    padding = _required_padding(signal_length, frame_size, hopsize)
+
+    if padding > 0:
+        padded_shape = (signal_length + padding,) + signal.shape[1:]
+        if padded_signal is None:
+            padded_signal = get_array_module(signal).empty(padded_shape, dtype=signal.dtype)
+        elif padded_signal.shape != padded_shape:
+            raise ValueError(f"Padded signal buffer has shape {padded_signal.shape}, expected {padded_shape}")
+        padded_signal[:signal_length] = signal
+        padded_signal[signal_length:] = 0
+        signal = padded_signal
+
+    # Extract the frames from the signal
+    # Should be of dimension (num_frames x frame_size [x num_channels])
+    return _frame_view(signal, frame_size)[::hopsize]
+
 
-    # num_frames = 100000000
-    # frames = np.empty([num_frames, frame_size])
-    frames = []
 
     
-    end_of_signal = False
+def cross_correlate(template: npt.NDArray, region: npt.NDArray, method: str = "auto") -> npt.NDArray:
+    """
+    Cross-correlates template with every template sized window of region (the "valid" part of the correlation)
+    Value at index k is the dot product between template and region[k:k+template_length]
+
+    method="direct" scores all the lags in a single np.correlate call, which is the fastest for the short templates
+    and narrow shift ranges WSOLA uses by default (a matmul against a sliding window view of region is ~10x slower
+    since the overlapping view isn't laid out for BLAS and gets copied first)
+    method="fft" goes through the frequency domain with real FFTs, which takes O(n log n) instead of
+    O(template_length * num_lags) and wins once there are many lags
+    method="auto" picks between the two based on template_length * num_lags
+    """
+    method = _resolve_correlation_method(template.shape[0], region.shape[0] - template.shape[0] + 1, method)
 
-    adjusted_analysis_frame_start_idx = 0
-    extended_frame_region_start_idx = analysis_hopsize
-    optimal_shift_idx = 0
+    if method == "direct":
+        # With region as the first argument np.correlate slides template along region, so the lags come out in increasing order
+        return np.correlate(region, template, mode="valid")
+    elif method != "fft":
+        raise ValueError(f"Unknown correlation method: {method}")
 
-    while not end_of_signal:
-        adjusted_analysis_frame = signal[adjusted_analysis_frame_start_idx:adjusted_analysis_frame_start_idx+frame_size]
-        # Insert our adjusted_analysis_frame into the frames list
-        frames.append(adjusted_analysis_frame)
-        natural_progression = signal[adjusted_analysis_frame_start_idx+synthesis_hopsize:adjusted_analysis_frame_start_idx+synthesis_hopsize+frame_size]
-        extended_frame_region = signal[extended_frame_region_start_idx+frame_shift_boundaries.min_shift:extended_frame_region_start_idx+frame_size+frame_shift_boundaries.max_shift]
-        optimal_shift_idx = np.argmax(np.correlate(natural_progression, extended_frame_region))
+    num_lags = region.shape[0] - template.shape[0] + 1
 
-        # Check if we reached end of signal
-        if signal_length < 1000000:
-            end_of_signal = True
+    # Zero padding both to at least the region length is enough to keep the circular wraparound out of the valid lags,
+    # rounding that up to a length with only small prime factors keeps the FFTs off pocketfft's much slower prime length paths
+    fft_length = _next_fast_fft_length(region.shape[0])
+    region_spectrum = np.fft.rfft(region, n=fft_length)
+    template_spectrum = np.fft.rfft(template, n=fft_length)
 
+    return np.fft.irfft(region_spectrum * np.conj(template_spectrum), n=fft_length)[:num_lags]
 
-        # Update our start indices
-        adjusted_analysis_frame_start_idx = (len(frames)*analysis_hopsize) + optimal_shift_idx
-        extended_frame_region_start_idx = (len(frames)+1) * analysis_hopsize
 
 
+def _resolve_correlation_method(template_length: int, num_lags: int, method: str) -> str:
+    """
+    Returns the method cross_correlate(method="auto") uses for a template_length long template and num_lags lags,
+    any other method is passed through
+    """
+    if method != "auto":
+        return method
 
-    return np.array(frames)
+    return "fft" if template_length * num_lags > _FFT_CORRELATION_THRESHOLD else "direct"
 
-# def split_into_frames(signal: npt.NDArray, frame_size: int, hopsize: int) -> npt.NDArray:
-#     """
-#     Splits signal into multiple frames, each having a fixed frame_size and spaced apart by hopsize
-#     """
-#     signal_length = signal.shape[0]
-#     signal_length_without_last_frame = signal_length - frame_size
-    
-#     # First check if signal_length_without_last_frame is a multiple of hopsize and pad accordingly if not
-#     if signal_length_without_last_frame % hopsize != 0:
-#         # signal_length_without_last_frame is not a multiple of hopsize, pad zeros until it is
-#         residual = signal_length - (hopsize*((signal_length_without_last_frame // hopsize) + 1))
-#         zeros = np.zeros(frame_size - residual)
-#         signal = np.concatenate((signal, zeros))
-#         # Update signal_length
-#         signal_length = signal.shape[0]
 
-#     # Extract the frames from the signal
-#     # Should be of dimension (num_frames x frame_size)
-#     frames = np.lib.stride_tricks.sliding_window_view(signal, frame_size)[::hopsize]
 
-#     return frames
+@functools.lru_cache(maxsize=32)
+def _next_fast_fft_length(length: int) -> int:
+    """
+    Returns the smallest length >= length whose only prime factors are 2, 3 and 5
+    """
+    fast_length = 2**int(np.ceil(np.log2(length)))
+    power_of_5 = 1
+    while power_of_5 < fast_length:
+        power_of_3 = power_of_5
+        while power_of_3 < fast_length:
+            # Smallest power of 2 multiple of power_of_3 that reaches length
+            candidate = power_of_3
+            while candidate < length:
+                candidate *= 2
+            fast_length = min(fast_length, candidate)
+            power_of_3 *= 3
+        power_of_5 *= 5
+
+    return fast_length
 
 
 
-    
 def reconstruct_from_frames(frames: npt.NDArray, hopsize: int) -> npt.NDArray:
     """
-    Constructs a signal by iteratively combining frames that are spaced apart by hopsize
-    frames is a numpy array with dimensions representing ("Number of Frames" x "Frame Size")
+    Constructs a signal by combining frames that are spaced apart by hopsize
+    frames is a numpy array with dimensions representing ("Number of Frames" x "Frame Size" [x "Number of Channels"])
+
+    Uses the parallel ola_reconstruct kernel when numba is available and frames is a host (numpy) array,
+    otherwise the frames are overlap-added block by block (see _overlap_add_blocks)
+    """
+    signal = get_array_module(frames).zeros((((frames.shape[0]-1)*hopsize) + frames.shape[1],) + frames.shape[2:], dtype=frames.dtype)
+
+    if _use_kernels(frames):
+        ola_reconstruct(_with_channel_axis(frames, 3), hopsize, _with_channel_axis(signal, 2))
+        return signal
+
+    return _overlap_add_blocks(frames, hopsize, signal)
+
+
+
+def _overlap_add_blocks(frames: npt.NDArray, hopsize: int, out: npt.NDArray, window: npt.NDArray = None) -> npt.NDArray:
     """
+    Adds frames that are spaced apart by hopsize, each multiplied by window when given, onto out in place
 
+    Every frame is cut into ceil(frame_size/hopsize) blocks of hopsize samples (the last one possibly shorter),
+    block k of frame i lands at out[(i+k)*hopsize:], so block k of all frames is added in one go through a strided view of out
+    whose rows start hopsize samples apart. The rows of such a view don't overlap, so the overlap-add takes one in-place add
+    per block instead of one per frame, without any index arrays
+    Windowing block by block means the windowed frames are never materialized, only one block of them at a time
+    """
+    xp = get_array_module(frames)
     num_frames = frames.shape[0]
     frame_size = frames.shape[1]
 
-    signal = np.zeros(((num_frames-1)*hopsize) + frame_size)
+    if frames.ndim == 3 and out.flags.c_contiguous:
+        # With interleaved channels sample j of channel c sits at j*num_channels+c, so this is the same overlap-add on the flattened
+        # frames and signal with every length scaled by num_channels, which saves numpy from looping over the short channel axis
+        num_channels = frames.shape[2]
+        window = None if window is None else xp.repeat(window, num_channels)
+        _overlap_add_blocks(frames.reshape(num_frames, frame_size*num_channels), hopsize*num_channels, out.reshape(-1), window)
+        return out
 
-    for frame_idx in range(num_frames):
-        start_idx = frame_idx * hopsize
-        end_idx = start_idx + frame_size
-        signal[start_idx:end_idx] += frames[frame_idx]
+    for block_start_idx in range(0, frame_size, hopsize):
+        block = frames[:, block_start_idx:block_start_idx+hopsize]
+        if window is not None:
+            block = block * _with_channel_axis(window[block_start_idx:block_start_idx+hopsize], frames.ndim-1)
 
-    return signal
+        # Row i of the view is out[block_start_idx+i*hopsize:block_start_idx+i*hopsize+block_length]
+        block_rows = xp.lib.stride_tricks.as_strided(out[block_start_idx:],
+                                                     shape=(num_frames, block.shape[1]) + out.shape[1:],
+                                                     strides=(hopsize*out.strides[0],) + out.strides)
+        block_rows += block
+
+    return out
+
+
+
+def _with_channel_axis(array: npt.NDArray, ndim: int) -> npt.NDArray:
+    """
+    Views a mono array with an extra trailing channel axis of size 1 so that it has ndim dimensions like a multichannel one,
+    this lets the kernels handle mono and multichannel signals the same way
+    """
+    return array if array.ndim == ndim else array[..., None]
+
+
+
+def overlap_add_windowed(frames: npt.NDArray,
+                         window: npt.NDArray,
+                         hopsize: int,
+                         out: npt.NDArray = None) -> npt.NDArray:
+    """
+    Constructs a signal by multiplying every frame by window and combining the windowed frames that are spaced apart by hopsize
+    frames is a numpy array with dimensions representing ("Number of Frames" x "Frame Size" [x "Number of Channels"])
+    The signal is written into out when given, overwriting its contents
+
+    For host arrays with numba available the windowing is fused into the overlap-add kernel, so the windowed frames are never written out
+    Otherwise (including cupy arrays) the frames are windowed and overlap-added block by block straight into out (see _overlap_add_blocks)
+    """
+    if out is None:
+        out = get_array_module(frames).zeros((((frames.shape[0]-1)*hopsize) + frames.shape[1],) + frames.shape[2:], dtype=np.result_type(frames, window))
+    else:
+        out.fill(0)
+
+    if _use_kernels(frames):
+        _overlap_add_windowed_kernel(_with_channel_axis(frames, 3), window, hopsize, _with_channel_axis(out, 2))
+        return out
+
+    return _overlap_add_blocks(frames, hopsize, out, window)
+
+
+
+def overlap_add_windowed_from_starts(signal: npt.NDArray,
+                                     frame_start_indices: npt.NDArray,
+                                     window: npt.NDArray,
+                                     hopsize: int,
+                                     out: npt.NDArray = None) -> npt.NDArray:
+    """
+    Same as overlap_add_windowed(split_frames, window, hopsize, out), where frame i of split_frames is the window sized slice of signal
+    starting at frame_start_indices[i] (e.g. the output of wsola_frame_starts)
+
+    For host arrays with numba available the kernel reads the frames straight out of signal, so the ("Number of Frames" x "Frame Size") matrix
+    of frames is never materialized, otherwise the frames are gathered first
+    """
+    frame_size = window.shape[0]
+
+    if _use_kernels(signal):
+        if out is None:
+            out = np.zeros((((frame_start_indices.shape[0]-1)*hopsize) + frame_size,) + signal.shape[1:], dtype=np.result_type(signal, window))
+        else:
+            out.fill(0)
+        _overlap_add_windowed_from_starts_kernel(_with_channel_axis(signal, 2), frame_start_indices, window, hopsize, _with_channel_axis(out, 2))
+        return out
+
+    xp = get_array_module(signal)
+    return overlap_add_windowed(xp.take(_frame_view(signal, frame_size), xp.asarray(frame_start_indices), axis=0), window, hopsize, out)
+
+
+
+def ola_envelope(window: npt.NDArray, hopsize: int, num_frames: int) -> npt.NDArray:
+    """
+    Computes the sum of num_frames copies of window that are spaced apart by hopsize, this is the envelope
+    that overlap-adding num_frames windowed frames scales the signal by
+
+    The tiled ("Number of Frames" x "Frame Size") matrix of windows is never materialized,
+    reconstruct_from_frames overlap-adds a zero-stride broadcast view of the window instead
+    """
+    return reconstruct_from_frames(np.broadcast_to(window, (num_frames, window.shape[0])), hopsize)
 
 
 
 
 
 
-def hann_window(window_length: int=64, symmetric_flag: bool=True) -> npt.NDArray:
+@functools.lru_cache(maxsize=32)
+def hann_window(window_length: int=64, symmetric_flag: bool=True, dtype: npt.DTypeLike=np.float32) -> npt.NDArray:
     """
     Implements a Hann (Hanning) window similar to the corresponding matlab function
     https://www.mathworks.com/help/signal/ref/hann.html
 
     Note: Returned window will be causal instead of centered around zero
+    Note: Windows are cached and shared between callers, so the returned array is read-only
+    Note: Defaults to float32, which is plenty for audio and halves the memory traffic of everything the window is multiplied into
     """
 
-    hann = np.empty(window_length)
+    # Sample indices in [0, window_length-1], the window is then computed in place in this one buffer
+    hann = np.arange(window_length, dtype=dtype)
 
     if symmetric_flag:
-        # Symmetric window 
-        # Generates points that are in [0, window_length-1]
-        numerator = np.linspace(0, window_length-1, window_length)
+        # Symmetric window
         denominator = window_length - 1
     else:
         # Periodic window
         # The left zero endpoint is included in the window, while the one on the right lies one sample outside to the right
-        # Generates points that are in [0, window_length-1]
-        numerator = np.linspace(0, window_length-1, window_length)
         denominator = window_length
 
-    hann = 0.5 * (1 - np.cos(((2*np.pi)*numerator) / denominator))
+    # 0.5 * (1 - cos(2*pi*n / denominator))
+    hann *= (2*np.pi) / denominator
+    np.cos(hann, out=hann)
+    np.subtract(1.0, hann, out=hann)
+    hann *= 0.5
+    hann.setflags(write=False)
 
     return hann
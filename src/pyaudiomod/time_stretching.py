@@ -1,12 +1,67 @@
 
+import collections
+import concurrent.futures
+import contextlib
+from typing import Iterator
+
 import numpy as np
 import numpy.typing as npt
 
-from sigproc import hann_window, split_into_frames, reconstruct_from_frames
+from sigproc import array_module, to_host, hann_window, wsola_frame_starts, split_into_frames_fixed, fixed_num_frames, wsola_num_frames, overlap_add_windowed, overlap_add_windowed_from_starts, ola_envelope
 from custom import FrameShiftBoundaries
 
 
 
+class _BufferPool:
+    """
+    Keeps released numpy arrays around, keyed by (shape, dtype), so that repeated runs on signals
+    of similar length reuse their temporary buffers instead of allocating new ones every time
+    Only the max_keys most recently used shapes are kept, each with at most max_buffers_per_key buffers
+    New buffers are allocated with the array module xp (numpy, or cupy for GPU buffers)
+    """
+
+    def __init__(self, xp=np, max_keys: int = 8, max_buffers_per_key: int = 2) -> None:
+        self._xp = xp
+        self._buffers: collections.OrderedDict[tuple, list[npt.NDArray]] = collections.OrderedDict()
+        self._max_keys = max_keys
+        self._max_buffers_per_key = max_buffers_per_key
+
+
+    def acquire(self, shape: tuple[int, ...], dtype: npt.DTypeLike) -> npt.NDArray:
+        """
+        Returns an uninitialized buffer, reusing a released one when available
+        """
+        buffers = self._buffers.get((shape, np.dtype(dtype)))
+        return buffers.pop() if buffers else self._xp.empty(shape, dtype=dtype)
+
+
+    def release(self, buffer: npt.NDArray) -> None:
+        """
+        Hands buffer back to the pool, the caller must not use it afterwards
+        """
+        key = (buffer.shape, buffer.dtype)
+        buffers = self._buffers.setdefault(key, [])
+        self._buffers.move_to_end(key)
+        if len(buffers) < self._max_buffers_per_key:
+            buffers.append(buffer)
+
+        while len(self._buffers) > self._max_keys:
+            self._buffers.popitem(last=False)
+
+
+    @contextlib.contextmanager
+    def borrow(self, shape: tuple[int, ...], dtype: npt.DTypeLike) -> Iterator[npt.NDArray]:
+        """
+        Context manager version of acquire/release
+        """
+        buffer = self.acquire(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+
+
 class TSM:
     """
     Base Class for Time Scale Modification (TSM) techniques
@@ -16,12 +71,186 @@ class TSM:
                  frame_size: int = 256,
                  speed_factor: float = 1.0,
                  synthesis_hopsize: int = None,
-                 analysis_hopsize: int = None) -> None:
+                 analysis_hopsize: int = None,
+                 dtype: npt.DTypeLike = np.float32,
+                 backend: str = "numpy") -> None:
         
         self.frame_size: int = frame_size # Should be a power of 2
         self.speed_factor: float = speed_factor # speed_factor<1 for slower speed, speed_factor=1 for original speed, speed_factor>1 for faster speed
         self.synthesis_hopsize: int = int(self.frame_size // 4) if synthesis_hopsize is None else synthesis_hopsize
         self.analysis_hopsize: int = int(self.synthesis_hopsize * self.speed_factor) if analysis_hopsize is None else analysis_hopsize
+        self.dtype: np.dtype = np.dtype(dtype) # Floating point type the whole pipeline runs in, float32 halves the memory traffic of float64
+        self.backend: str = backend # "numpy" runs on the CPU, "cupy" keeps the signal on the GPU from framing to normalization
+        self._xp = array_module(backend)
+
+        # Normalization envelope of the last run, reused as long as the number of frames doesn't change
+        self._cached_envelope: tuple[int, npt.NDArray] = None
+        # Temporary buffers reused across runs
+        self._pool = _BufferPool(self._xp)
+
+
+    def run(self, signal: npt.NDArray) -> npt.NDArray:
+        """
+        Time scales signal and returns the result as a new numpy array, with the cupy backend it is copied back from the GPU only here
+        """
+        return to_host(self.run_into(signal))
+
+
+    def run_into(self, signal: npt.NDArray, out: npt.NDArray = None) -> npt.NDArray:
+        """
+        Time scales signal, writing the result into out when given instead of allocating a new array
+        The result (and out) is an array of the backend, i.e. stays on the GPU with the cupy backend
+        Subclasses implement their algorithm here
+        """
+        raise NotImplementedError
+
+
+    def _as_float_signal(self, signal: npt.NDArray) -> npt.NDArray:
+        """
+        Converts signal to dtype once on entry so every later copy, multiply and FFT runs in that precision,
+        signals that already have the right dtype are passed through without a copy
+        signal is either mono with shape ("Signal Length",) or multichannel with shape ("Signal Length" x "Number of Channels")
+        """
+        signal = self._xp.asarray(signal, dtype=self.dtype)
+        if signal.ndim not in (1, 2):
+            raise ValueError(f"Expected a mono (N,) or multichannel (N, C) signal, got shape {signal.shape}")
+        return signal
+
+
+    def _output_buffer(self, out: npt.NDArray, shape: tuple[int, ...]) -> npt.NDArray:
+        """
+        Returns out after checking it has the shape and dtype of the time scaled signal, or a new array if out is None
+        """
+        if out is None:
+            return self._xp.empty(shape, dtype=self.dtype)
+        if out.shape != shape:
+            raise ValueError(f"Output buffer has shape {out.shape}, the time scaled signal needs {shape}")
+        if out.dtype != self.dtype:
+            raise ValueError(f"Output buffer has dtype {out.dtype}, the time scaled signal needs {self.dtype}")
+
+        return out
+
+
+    def _init_windows(self, synthesis_window: npt.NDArray = None, analysis_window: npt.NDArray = None) -> None:
+        """
+        Sets the synthesis and analysis windows, defaulting to a periodic Hann window of frame_size, in dtype
+        The default is fetched once and shared by both windows (and, since hann_window is cached, by every instance with the same frame_size)
+        """
+        default_window = self._xp.asarray(hann_window(self.frame_size, False, self.dtype)) if synthesis_window is None or analysis_window is None else None
+
+        self.synthesis_window: npt.NDArray = default_window if synthesis_window is None else self._xp.asarray(synthesis_window, dtype=self.dtype)
+        self.analysis_window: npt.NDArray = default_window if analysis_window is None else self._xp.asarray(analysis_window, dtype=self.dtype)
+
+
+    def _init_normalization(self, window: npt.NDArray = None) -> None:
+        """
+        Checks once whether the synthesis window (or window, when the overlap-added frames are windowed by something else) satisfies the (generalized) COLA constraint for the synthesis hopsize,
+        i.e. whether the overlapped windows sum to a constant everywhere except the first and last frame_size-synthesis_hopsize samples
+        If so, the constant is folded into _scaled_synthesis_window, which the subclasses window their synthesis frames with,
+        so that the interior of the envelope becomes 1.0 and runs only divide the edges by the envelope
+        instead of dividing the whole signal by a full length envelope
+        Called by the subclasses once their synthesis_window is set
+        The envelopes are computed on the host and only the ones _normalize divides by are moved to the backend
+        """
+        self._normalization_window: npt.NDArray = to_host(self.synthesis_window if window is None else window)
+
+        num_overlaps = -(-self.frame_size // self.synthesis_hopsize)
+        edge_length = max(self.frame_size - self.synthesis_hopsize, 0)
+
+        # With num_overlaps+1 frames every sample of the hop after the leading edge is covered by all the frames that can overlap it
+        # (the extra frame makes the envelope long enough to hold a full hop when synthesis_hopsize > frame_size)
+        envelope = ola_envelope(self._normalization_window, self.synthesis_hopsize, num_overlaps+1)
+        interior = envelope[edge_length:edge_length+self.synthesis_hopsize]
+
+        self._num_overlaps: int = num_overlaps
+        self._is_cola: bool = bool(interior.min() > 0 and np.ptp(interior) <= 1e-6 * interior.max())
+        self._scaled_synthesis_window: npt.NDArray = self.synthesis_window
+
+        cola_gain = float(interior.mean())
+        if self._is_cola and abs(cola_gain - 1.0) > 1e-6:
+            # Dividing the synthesis window by the constant divides the whole envelope by it, normalizing the interior for free
+            scaled_synthesis_window = to_host(self.synthesis_window) / cola_gain
+            scaled_synthesis_window.setflags(write=False)
+            self._scaled_synthesis_window = self._xp.asarray(scaled_synthesis_window)
+            self._normalization_window = self._normalization_window / cola_gain
+            envelope /= cola_gain
+
+        # Away from the edges the envelope repeats every hop, so it can only be zero at these offsets into every hop
+        self._interior_zero_offsets: npt.NDArray = np.flatnonzero(interior == 0)
+
+        envelope[envelope == 0] = 1.0
+        self._edge_envelopes: tuple[npt.NDArray, npt.NDArray] = (self._xp.asarray(envelope[:edge_length]), self._xp.asarray(envelope[envelope.shape[0]-edge_length:]))
+
+
+    def _synthesize(self, frames: npt.NDArray, out: npt.NDArray, frame_start_indices: npt.NDArray = None) -> npt.NDArray:
+        """
+        Windows frames with _scaled_synthesis_window, overlap-adds them synthesis_hopsize apart into out and normalizes out in place
+        frames are the synthesis frames ("Number of Frames" x "Frame Size" [x "Number of Channels"]), or, when frame_start_indices is given,
+        the signal the frames are read out of at those start indices (see sigproc.overlap_add_windowed_from_starts)
+        Shared tail of the subclasses' run_into, returns out
+        """
+        if frame_start_indices is None:
+            num_frames = frames.shape[0]
+            overlap_add_windowed(frames, self._scaled_synthesis_window, self.synthesis_hopsize, out=out)
+        else:
+            num_frames = frame_start_indices.shape[0]
+            overlap_add_windowed_from_starts(frames, frame_start_indices, self._scaled_synthesis_window, self.synthesis_hopsize, out=out)
+
+        # We need to normalize our signal by the sum of the overlapped window functions
+        # so we don't get any amplitude fluctuations caused by the overlapping and adding
+        # When the windows satisfy the COLA constraint (Constant Overlap-Add Constraint), e.g. a Hann window spaced 50% of frame size apart,
+        # this sum is a constant everywhere except at the edges of the signal, which the scaled synthesis window already divides out
+        self._normalize(out, num_frames)
+
+        return out
+
+
+    def _normalize(self, signal: npt.NDArray, num_frames: int) -> None:
+        """
+        Divides signal, overlap-added from num_frames windowed frames, by the sum of the overlapped windows in place
+        """
+        # Work on the transpose so the 1D envelopes broadcast over the channels of multichannel signals
+        signal = signal.T
+
+        # With too few frames the edges run into each other and there's no constant interior
+        if not self._is_cola or num_frames < 2 * self._num_overlaps:
+            signal /= self._normalization_envelope(num_frames)
+            return
+
+        # The interior is already normalized by _scaled_synthesis_window
+        head_envelope, tail_envelope = self._edge_envelopes
+        edge_length = head_envelope.shape[0]
+
+        if edge_length > 0:
+            signal[..., :edge_length] /= head_envelope
+            signal[..., signal.shape[-1]-edge_length:] /= tail_envelope
+
+
+    def _normalization_envelope(self, num_frames: int) -> npt.NDArray:
+        """
+        Returns the sum of the overlapped synthesis windows for num_frames frames, used by the
+        subclasses that window their frames to undo the amplitude fluctuations of overlapping and adding
+        Zeros (where no window contributes) are replaced by 1.0 so the envelope can always be divided by
+        """
+        if self._cached_envelope is None or self._cached_envelope[0] != num_frames:
+            envelope = ola_envelope(self._normalization_window, self.synthesis_hopsize, num_frames)
+
+            if num_frames < 2 * self._num_overlaps:
+                # Short envelope, its edges run into each other so just scan it
+                envelope[envelope == 0] = 1.0
+            else:
+                # The zeros can only be in the edges or at fixed offsets into every hop in between,
+                # so scan just the edges and patch the interior at those offsets in place
+                edge_length = self._edge_envelopes[0].shape[0]
+                interior_end_idx = envelope.shape[0] - edge_length
+                for edge_envelope in (envelope[:edge_length], envelope[interior_end_idx:]):
+                    edge_envelope[edge_envelope == 0] = 1.0
+                for offset in self._interior_zero_offsets:
+                    envelope[edge_length+offset:interior_end_idx:self.synthesis_hopsize] = 1.0
+
+            self._cached_envelope = (num_frames, self._xp.asarray(envelope))
+
+        return self._cached_envelope[1]
         
 
 
@@ -34,41 +263,33 @@ class OLA(TSM):
                  synthesis_hopsize: int = None, 
                  analysis_hopsize: int = None,
                  synthesis_window: npt.NDArray = None,
-                 analysis_window: npt.NDArray = None) -> None:
-        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize)
+                 analysis_window: npt.NDArray = None,
+                 dtype: npt.DTypeLike = np.float32,
+                 backend: str = "numpy") -> None:
+        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize, dtype, backend)
 
-        self.synthesis_window = hann_window(frame_size, False) if synthesis_window is None else synthesis_window
-        self.analysis_window = hann_window(frame_size, False) if analysis_window is None else analysis_window
+        self._init_windows(synthesis_window, analysis_window)
+        self._init_normalization()
         
 
 
 
 
-    def run(self, signal: npt.NDArray) -> npt.NDArray:
+    def run_into(self, signal: npt.NDArray, out: npt.NDArray = None) -> npt.NDArray:
         """
         Implements a TSM based on the Overlap-Add algorithm
         This method is suitable for percussive and transient sounds
         """
+        signal = self._as_float_signal(signal)
 
-        analysis_frames = split_into_frames(signal, self.frame_size, self.analysis_hopsize)
+        num_frames = fixed_num_frames(signal.shape[0], self.frame_size, self.analysis_hopsize)
+        out = self._output_buffer(out, (((num_frames-1)*self.synthesis_hopsize) + self.frame_size,) + signal.shape[1:])
 
+        with self._pool.borrow((((num_frames-1)*self.analysis_hopsize) + self.frame_size,) + signal.shape[1:], signal.dtype) as padded_signal:
+            analysis_frames = split_into_frames_fixed(signal, self.frame_size, self.analysis_hopsize, padded_signal)
 
-        # We need to normalize our windowed frames by the sum of the overlapped window functions
-        # so we don't get any amplitude fluctuations caused by the overlapping and adding
-        if self.synthesis_hopsize == int(self.frame_size // 2):
-            # In this case the windows are spaced exactly 50% of frame size apart so they overlap perfectly to sum to a constant 1.0
-            # This is called the COLA constraint (Constant Overlap-Add Constraint)
-            normalization = 1.0
-        else:
-            normalization = self.synthesis_window[0:self.analysis_hopsize].sum() * self.frame_size
-
-        # Generate our synthesis_frames
-        print(normalization)
-        # Need element wise division by normalization?
-        synthesis_frames = (analysis_frames * self.synthesis_window) / normalization
-
-        # Reconstruct our signal by using the synthesis_frames
-        return reconstruct_from_frames(synthesis_frames, self.synthesis_hopsize)
+            # Reconstruct our signal by windowing the analysis_frames into synthesis frames and overlap-adding them in one pass
+            return self._synthesize(analysis_frames, out)
     
 
 class WSOLA(TSM):
@@ -79,37 +300,36 @@ class WSOLA(TSM):
                  analysis_hopsize: int = None,
                  synthesis_window: npt.NDArray = None,
                  analysis_window: npt.NDArray = None,
-                 frame_shift_boundaries: type[FrameShiftBoundaries] = None) -> None:
-        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize)
+                 frame_shift_boundaries: FrameShiftBoundaries = None,
+                 correlation_method: str = "auto",
+                 dtype: npt.DTypeLike = np.float32,
+                 backend: str = "numpy") -> None:
+        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize, dtype, backend)
 
-        self.synthesis_window = hann_window(frame_size, False) if synthesis_window is None else synthesis_window
-        self.analysis_window = hann_window(frame_size, False) if analysis_window is None else analysis_window
+        self._init_windows(synthesis_window, analysis_window)
         self.frame_shift_boundaries = FrameShiftBoundaries() if frame_shift_boundaries is None else frame_shift_boundaries
+        self.correlation_method: str = correlation_method # "direct", "fft" or "auto" (see sigproc.cross_correlate)
+        self._init_normalization()
 
 
 
-    def run(self, signal: npt.NDArray) -> npt.NDArray:
+    def run_into(self, signal: npt.NDArray, out: npt.NDArray = None) -> npt.NDArray:
         """
         Implements a TSM based on the Waveform Similarity Overlap-Add algorithm
         This method is an improvement on the OLA algorithm by attempting to address 
         the lack of signal sensitivity
         """
+        signal = self._as_float_signal(signal)
 
-        analysis_frames = split_into_frames(signal, self.frame_size, self.synthesis_hopsize, self.analysis_hopsize, self.frame_shift_boundaries)
+        num_frames = wsola_num_frames(signal.shape[0], self.frame_size, self.synthesis_hopsize, self.analysis_hopsize, self.frame_shift_boundaries)
+        out = self._output_buffer(out, (((num_frames-1)*self.synthesis_hopsize) + self.frame_size,) + signal.shape[1:])
 
+        # Only the start index of every analysis frame is needed, the frames are read straight out of the signal while overlap-adding
+        analysis_frame_start_indices = wsola_frame_starts(signal, self.frame_size, self.synthesis_hopsize, self.analysis_hopsize,
+                                                          self.frame_shift_boundaries, self.correlation_method)
 
-        # We need to normalize our windowed frames by the sum of the overlapped window functions
-        # so we don't get any amplitude fluctuations caused by the overlapping and adding
-        if self.synthesis_hopsize == int(self.frame_size // 2):
-            normalization = 1.0
-        else:
-            normalization = self.synthesis_window.sum()
-
-        # Generate our synthesis_frames
-        synthesis_frames = (analysis_frames * self.synthesis_window) / normalization
-
-        # Reconstruct our signal by using the synthesis_frames
-        return reconstruct_from_frames(synthesis_frames, self.synthesis_hopsize)
+        # Reconstruct our signal by windowing the analysis frames into synthesis frames and overlap-adding them in one pass
+        return self._synthesize(signal, out, analysis_frame_start_indices)
     
 
 class PV(TSM):
@@ -117,16 +337,78 @@ class PV(TSM):
                  frame_size: int = 256, 
                  speed_factor: float = 1, 
                  synthesis_hopsize: int = None, 
-                 analysis_hopsize: int = None) -> None:
-        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize)
+                 analysis_hopsize: int = None,
+                 synthesis_window: npt.NDArray = None,
+                 analysis_window: npt.NDArray = None,
+                 dtype: npt.DTypeLike = np.float32,
+                 backend: str = "numpy") -> None:
+        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize, dtype, backend)
 
+        self._init_windows(synthesis_window, analysis_window)
+        # Frames are windowed before the FFT and again after the inverse FFT, so the overlap-added envelope is that of the product
+        self._init_normalization(self.analysis_window * self.synthesis_window)
 
-    def run(self, signal: npt.NDArray) -> npt.NDArray:
+        # Phase every frequency bin advances by per analysis hop when it sits exactly on its center frequency
+        self._bin_frequencies: npt.NDArray = (2*np.pi / frame_size) * self._xp.arange((frame_size // 2) + 1)
+
+
+    def run_into(self, signal: npt.NDArray, out: npt.NDArray = None) -> npt.NDArray:
         """
         Implements a TSM based on the Phase Vocoder algorithm
         This method is suitable for harmonic sounds
         """
-        return signal
+        xp = self._xp
+        signal = self._as_float_signal(signal)
+
+        num_frames = fixed_num_frames(signal.shape[0], self.frame_size, self.analysis_hopsize)
+        out = self._output_buffer(out, (((num_frames-1)*self.synthesis_hopsize) + self.frame_size,) + signal.shape[1:])
+
+        with self._pool.borrow((((num_frames-1)*self.analysis_hopsize) + self.frame_size,) + signal.shape[1:], signal.dtype) as padded_signal:
+            analysis_frames = split_into_frames_fixed(signal, self.frame_size, self.analysis_hopsize, padded_signal)
+
+            # The spectral stage runs channel major, on ("Number of Frames" [x "Number of Channels"] x "Frame Size") frames, so every FFT
+            # transforms contiguous samples instead of striding over the interleaved channels
+            if signal.ndim == 2:
+                analysis_frames = analysis_frames.transpose(0, 2, 1)
+            windowed_frames = xp.empty(analysis_frames.shape, dtype=analysis_frames.dtype)
+            xp.multiply(analysis_frames, self.analysis_window, out=windowed_frames)
+
+        # A single batched FFT over the last axis of the whole matrix instead of one FFT call per frame
+        spectra = xp.fft.rfft(windowed_frames, axis=-1)
+        magnitudes = xp.abs(spectra)
+        synthesis_phases = self._propagate_phases(xp.angle(spectra))
+
+        # Batched inverse FFT back to frames, cast so the overlap-add runs in the dtype of the output
+        synthesis_frames = xp.fft.irfft(magnitudes * xp.exp(1j * synthesis_phases), n=self.frame_size, axis=-1).astype(self.dtype, copy=False)
+        if signal.ndim == 2:
+            # Back to the ("Number of Frames" x "Frame Size" x "Number of Channels") layout of the output, as a view
+            synthesis_frames = synthesis_frames.transpose(0, 2, 1)
+
+        # Normalized by the sum of the overlapped analysis*synthesis windows (see _init_normalization)
+        return self._synthesize(synthesis_frames, out)
+
+
+    def _propagate_phases(self, analysis_phases: npt.NDArray) -> npt.NDArray:
+        """
+        Turns the phases of the analysis spectra ("Number of Frames" [x "Number of Channels"] x "Number of Bins") into the phases
+        of the synthesis spectra, so that every bin keeps advancing at its instantaneous frequency from one synthesis hop to the next
+        All frames are handled at once, the per frame phase accumulation is a cumulative sum over the frame axis
+        """
+        xp = self._xp
+        bin_frequencies = self._bin_frequencies
+
+        # Deviation of the measured phase advance from the one expected at the bin center frequency, wrapped into [-pi, pi)
+        phase_deviations = xp.diff(analysis_phases, axis=0) - (bin_frequencies * self.analysis_hopsize)
+        phase_deviations -= (2*np.pi) * xp.round(phase_deviations / (2*np.pi))
+        instantaneous_frequencies = bin_frequencies + (phase_deviations / self.analysis_hopsize)
+
+        # The first synthesis frame keeps its analysis phases, every following one advances by a synthesis hop
+        synthesis_phases = xp.empty(analysis_phases.shape, dtype=np.float64)
+        synthesis_phases[0] = analysis_phases[0]
+        xp.cumsum(instantaneous_frequencies * self.synthesis_hopsize, axis=0, out=synthesis_phases[1:])
+        synthesis_phases[1:] += analysis_phases[0]
+
+        return synthesis_phases
     
 
 class HPS(TSM):
@@ -134,8 +416,17 @@ class HPS(TSM):
                  frame_size: int = 256, 
                  speed_factor: float = 1, 
                  synthesis_hopsize: int = None, 
-                 analysis_hopsize: int = None) -> None:
-        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize)
+                 analysis_hopsize: int = None,
+                 dtype: npt.DTypeLike = np.float32,
+                 backend: str = "numpy") -> None:
+        super().__init__(frame_size, speed_factor, synthesis_hopsize, analysis_hopsize, dtype, backend)
+
+        # The harmonic component is time scaled by a phase vocoder and the percussive one by OLA, both with the hopsizes resolved above
+        self._pv = PV(self.frame_size, self.speed_factor, self.synthesis_hopsize, self.analysis_hopsize, dtype=self.dtype, backend=self.backend)
+        self._ola = OLA(self.frame_size, self.speed_factor, self.synthesis_hopsize, self.analysis_hopsize, dtype=self.dtype, backend=self.backend)
+        # The two components are independent, so the PV runs on this worker thread while OLA runs on the calling one
+        # (numpy's FFTs and the numba kernels release the GIL)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
 
     def _hps(self, signal: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray]:
@@ -149,13 +440,14 @@ class HPS(TSM):
         return harmonic, percussive
     
 
-    def run(self, signal: npt.NDArray) -> npt.NDArray:
+    def run_into(self, signal: npt.NDArray, out: npt.NDArray = None) -> npt.NDArray:
         """
         Implements a TSM based on the Harmonic-Percussive Seperation algorithm
         """
-        harmonic_component, percussive_component = self._hps(signal)
+        harmonic_component, percussive_component = self._hps(self._as_float_signal(signal))
 
-        time_stretched_harmonic_component: npt.NDArray = PV.run(harmonic_component)
-        time_stretched_percussive_component: npt.NDArray = OLA.run(percussive_component)
-        
-        return (time_stretched_harmonic_component + time_stretched_percussive_component)
+        time_stretched_harmonic_component = self._executor.submit(self._pv.run_into, harmonic_component)
+        out = self._ola.run_into(percussive_component, out)
+        out += time_stretched_harmonic_component.result()
+
+        return out